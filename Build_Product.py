@@ -9,32 +9,235 @@ Purpose
 
 Important notes (forward-looking)
 - Credentials should not be hardcoded. Use environment variables or a secrets manager.
-- The OpenAI usage shown here uses a legacy completion endpoint and model name. You will likely want
-  to migrate to the current OpenAI SDK patterns for chat or responses APIs.
-- The Sellbrite Authorization header in this script is not correctly formatted for HTTP Basic Auth.
-  See README for the correct approach.
-- The eBay FindingService API is legacy and XML-based. It may require additional namespaces and error handling.
+- OpenAI is called through the chat completions API in JSON mode, so the metadata is parsed
+  from a JSON object rather than from line positions.
+- Sellbrite uses HTTP Basic auth (base64 of "key:secret"), configured once on a dedicated session.
+- The eBay FindingService API is legacy and XML-based. It may require additional error handling.
 """
 
 import cv2                           # OpenCV for camera access and image capture
+import numpy as np                   # Preallocated frame buffers for OpenCV
+import queue                         # Hand-off of the latest frame from the grabber thread
+import threading                     # Background camera grabber
 from pyzbar import pyzbar            # Barcode decoding from images
 import requests                      # HTTP client for Sellbrite and eBay requests
-import json                          # JSON serialization for the Sellbrite payload
-import openai                        # OpenAI SDK (legacy usage shown in generate_product_info)
+from requests.adapters import HTTPAdapter  # Connection pooling for the shared HTTP session
+from urllib3.util.retry import Retry  # Backoff policy for transient HTTP failures
+from urllib3.exceptions import NewConnectionError  # Connection failures where no request was sent
+import orjson                        # Fast JSON encoding/decoding for API payloads and responses
+import time                          # Polling interval for OpenAI batch jobs
+from openai import OpenAI            # OpenAI SDK client for chat completions
 from datetime import datetime        # Timestamp for SKU generation
-import xml.etree.ElementTree as ET   # XML parsing for eBay FindingService responses
+import fcntl                         # File locking for the SKU sequence file
+import re                            # Extracting numbers from model-generated prices
+import statistics                    # Median of eBay sold prices
+import functools                     # Memoize the per-credential Sellbrite session
+from types import MappingProxyType   # Read-only view for module-level parameter templates
+from concurrent.futures import ThreadPoolExecutor  # Run independent API lookups in parallel
+import diskcache                     # On-disk cache of OpenAI/eBay lookups keyed by UPC
+
+# XML parsing for eBay FindingService responses.
+# Prefer lxml's C parser when installed; otherwise fall back to the standard library,
+# whose ElementTree already uses the C _elementtree accelerator on Python 3.
+try:
+    from lxml import etree as ET
+except ImportError:
+    import xml.etree.ElementTree as ET
 
 # A local file used to persist the last used sequential number for SKU creation.
 # This file must exist before running, and contain an integer (example: 0).
 SEQUENTIAL_FILE = 'sequential_number.txt'
 
+# Camera device index. 0 is commonly the default webcam; 1 may be a second camera.
+CAMERA_INDEX = 1
+
+# Pause after a failed grab() so a stalled camera does not spin the grabber thread.
+GRAB_RETRY_SECONDS = 0.1
+
+# Requested camera capture format. The driver picks the nearest mode it supports.
+CAMERA_WIDTH = 1280
+CAMERA_HEIGHT = 720
+CAMERA_FPS = 30
+
+# Only every Nth grabbed camera frame is decoded and handed to pyzbar.
+# Grabbing without decoding keeps the stream current at a fraction of the CPU cost.
+RETRIEVE_EVERY_N = 4
+
+# Frames at least this wide are downscaled by half before barcode decoding.
+# Narrower frames are decoded at full size so small or distant barcodes still resolve.
+DOWNSCALE_MIN_WIDTH = 1280
+
+# Barcode symbologies accepted as a product UPC. pyzbar only runs these decoders.
+UPC_SYMBOLS = [pyzbar.ZBarSymbol.UPCA, pyzbar.ZBarSymbol.UPCE, pyzbar.ZBarSymbol.EAN13]
+UPC_SYMBOL_NAMES = {symbol.name for symbol in UPC_SYMBOLS}
+
+# eBay FindingService XML namespace. ElementTree reports tags as "{namespace}localname".
+EBAY_NS = 'http://www.ebay.com/marketplace/search/v1/services'
+EBAY_ACK_TAG = f'{{{EBAY_NS}}}ack'
+EBAY_ITEM_TAG = f'{{{EBAY_NS}}}item'
+EBAY_PRICE_PATH = f'{{{EBAY_NS}}}sellingStatus/{{{EBAY_NS}}}currentPrice'
+
+# First number in a free-form price string: "$19.99", "$.99", or "$1,299.99".
+# A comma only counts as a thousands separator in complete 3-digit groups, so a decimal
+# comma ("19,99 EUR") reads as 19 rather than 1999.
+PRICE_RE = re.compile(r'\d{1,3}(?:,\d{3})+(?![\d,])(?:\.\d+)?|\d*\.\d+|\d+')
+
+# Maximum number of sold items sampled for the eBay price estimate.
+EBAY_MAX_ITEMS = 25
+
+# Static query parameters documented by eBay Finding API (legacy).
+# get_ebay_sold_price adds SECURITY-APPNAME and keywords per call; read-only so no caller
+# can mutate the shared template.
+EBAY_PARAMS_BASE = MappingProxyType({
+    'OPERATION-NAME': 'findCompletedItems',
+    'SERVICE-VERSION': '1.0.0',
+    'GLOBAL-ID': 'EBAY-US',
+    'RESPONSE-DATA-FORMAT': 'XML',
+    'REST-PAYLOAD': '',
+    # Filter only used items
+    'itemFilter(0).name': 'Condition',
+    'itemFilter(0).value': 'Used',
+    # Require sold items only
+    'itemFilter(1).name': 'SoldItemsOnly',
+    'itemFilter(1).value': 'true',
+    # Reduce duplicates
+    'itemFilter(2).name': 'HideDuplicateItems',
+    'itemFilter(2).value': 'true',
+    # Only request as many items as get_ebay_sold_price will read
+    'paginationInput.entriesPerPage': str(EBAY_MAX_ITEMS),
+})
+
+
+def _build_session(retries):
+    """
+    Build a pooled HTTP session for outbound eBay and Sellbrite calls.
+
+    - Keep-alive connections are pooled per host, so repeat calls skip the TCP and TLS handshake.
+    - Failed requests are retried according to `retries`, a urllib3 Retry policy.
+    """
+    session = requests.Session()
+    session.mount('https://', HTTPAdapter(pool_connections=10, pool_maxsize=10, max_retries=retries))
+    return session
+
+
+# Module-level session for unauthenticated outbound requests (eBay).
+# Transient failures (429 and common 5xx) are retried with exponential backoff, honoring
+# Retry-After. If they persist, requests raises rather than handing back an error body.
+SESSION = _build_session(Retry(
+    total=3,
+    backoff_factor=0.5,
+    status_forcelist=[429, 500, 502, 503, 504],
+    respect_retry_after_header=True,
+))
+
+
+@functools.lru_cache(maxsize=None)
+def _sellbrite_session(api_key, api_secret):
+    """
+    Return a pooled session pre-configured for the Sellbrite API.
+
+    Credentials and the JSON Content-Type are set once on the session, so requests emits
+    a correctly base64-encoded Basic Authorization header on every call. It is separate
+    from SESSION so Sellbrite credentials are never sent to other hosts.
+
+    POST is retried as well, so a transient 429/503 on product creation does not throw
+    away the OpenAI call and SKU that went into the payload. Creating a product is not
+    idempotent, so only failures that mean the request was not processed are retried:
+    429/503 responses and connection failures. Read errors and other 5xx are not retried,
+    because the product may already exist.
+    """
+    session = _build_session(Retry(
+        total=3,
+        read=0,
+        other=0,
+        backoff_factor=0.5,
+        status_forcelist=[429, 503],
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS | {'POST'},
+        respect_retry_after_header=True,
+        # Return the last response once retries run out, so its status can be inspected.
+        raise_on_status=False,
+    ))
+    session.auth = (api_key, api_secret)
+    session.headers['Content-Type'] = 'application/json'
+    return session
+
+
+# OpenAI client and model used for product metadata generation.
+# Replace the placeholder key or, preferably, set OPENAI_API_KEY and drop the argument.
+OPENAI_CLIENT = OpenAI(api_key='your_openai_api_key')
+OPENAI_MODEL = 'gpt-4o-mini'
+
+# Output-token budget per UPC, and OPENAI_MODEL's per-request output-token limit.
+OPENAI_TOKENS_PER_PRODUCT = 500
+OPENAI_MAX_OUTPUT_TOKENS = 16384
+
+# UPCs sent per generate_product_info_batch call. 20 * 500 tokens stays well under the limit.
+OPENAI_BATCH_SIZE = 20
+
+# Product metadata fields requested from OpenAI, in the order generate_product_info returns them.
+PRODUCT_INFO_FIELDS = ('title', 'description', 'brand', 'manufacturer', 'model_number', 'msrp', 'category')
+PRODUCT_INFO_SYSTEM_PROMPT = (
+    'You write product listings for a retail catalog. Given a UPC code, return strict JSON '
+    f'with keys {",".join(PRODUCT_INFO_FIELDS)}. All values must be strings.'
+)
+PRODUCT_INFO_BATCH_SYSTEM_PROMPT = (
+    'You write product listings for a retail catalog. Given a JSON list of UPC codes under "upcs", '
+    'return strict JSON {"products": [...]} where products[i] corresponds to upcs[i] and each '
+    f'element has keys {",".join(PRODUCT_INFO_FIELDS)}. All values must be strings.'
+)
+
+# Local cache directory for per-UPC lookup results, and how long entries stay valid.
+# Rescanning the same product within this window skips the OpenAI and eBay calls entirely.
+CACHE_DIR = '.upc_cache'
+CACHE_EXPIRE_SECONDS = 24 * 60 * 60
+
+# Sentinel returned by cache lookups on a miss, since None is itself a cacheable result.
+_CACHE_MISS = object()
+
+
+@functools.lru_cache(maxsize=None)
+def get_cache():
+    """
+    Return the on-disk lookup cache, opening it on first use.
+    Opening lazily means importing this module does not create CACHE_DIR.
+    """
+    return diskcache.Cache(CACHE_DIR)
+
+
+def _memoize(name):
+    """
+    Cache a function's results on disk for CACHE_EXPIRE_SECONDS, keyed as (name, *args).
+
+    Equivalent to diskcache's Cache.memoize, but the cache is only opened when the function
+    is first called. The wrapper exposes __cache_key__(*args) so callers can read or seed
+    entries directly. Exceptions are not cached.
+    """
+    def decorator(func):
+        def cache_key(*args):
+            return (name,) + args
+
+        @functools.wraps(func)
+        def wrapper(*args):
+            cache = get_cache()
+            key = cache_key(*args)
+            result = cache.get(key, default=_CACHE_MISS)
+            if result is _CACHE_MISS:
+                result = func(*args)
+                cache.set(key, result, expire=CACHE_EXPIRE_SECONDS)
+            return result
+
+        wrapper.__cache_key__ = cache_key
+        return wrapper
+
+    return decorator
+
 
 def main():
     """
     Main entrypoint:
     1) Initialize API credentials
     2) Open a camera device
-    3) Read frames until a UPC barcode is detected
+    3) Grab frames on a background thread and decode them here until a UPC is detected
     4) Release camera resources
     5) Create a Sellbrite product using the scanned UPC
     """
@@ -45,44 +248,169 @@ def main():
     api_secret = 'your_api_secret'
 
     # Open a camera device.
-    # Index 0 is commonly the default webcam. Index 1 may be a second camera.
-    # You may need to change this depending on your machine.
-    camera = cv2.VideoCapture(1)
+    # You may need to change CAMERA_INDEX depending on your machine.
+    camera = cv2.VideoCapture(CAMERA_INDEX)
 
     # Will hold the scanned UPC once found.
     upc_code = None
 
-    # Loop until a UPC barcode is detected.
-    # This is a tight loop and can be CPU-heavy. Consider adding a small sleep or showing the frame.
-    while upc_code is None:
-        # Read a frame from the camera.
-        # ret indicates success; frame is the captured image.
-        ret, frame = camera.read()
+    # Latest decoded camera frame, handed from the grabber thread to this thread.
+    # maxsize=1: the grabber replaces a frame the decoder has not taken yet, so the
+    # decoder always sees the newest frame and never works through a backlog.
+    frames = queue.Queue(maxsize=1)
+
+    # Frame buffers not currently in use. Three is enough for one being filled by the
+    # grabber, one waiting in frames, and one being decoded here.
+    free_buffers = queue.Queue()
+
+    # Tells the grabber thread to stop once a UPC is found or scanning is interrupted.
+    stop = threading.Event()
+    grabber = None
+
+    try:
+        # Without a device the grabber would spin on failed grab() calls forever.
+        if not camera.isOpened():
+            raise RuntimeError(f'Could not open camera {CAMERA_INDEX}')
+
+        # Keep the driver-side frame queue short so we decode what the camera sees now,
+        # not frames that have been sitting in the V4L2 buffer (default is ~4 frames).
+        # Not every backend honors this property; it is safe to set regardless.
+        camera.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+        # Ask for compressed MJPG at a modest resolution instead of the driver default,
+        # which on many USB webcams is uncompressed YUY2 at maximum resolution (the
+        # slowest ingest path). FOURCC is set first because some drivers only accept
+        # the higher resolutions once MJPG is selected. Unsupported values are ignored.
+        camera.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+        camera.set(cv2.CAP_PROP_FRAME_WIDTH, CAMERA_WIDTH)
+        camera.set(cv2.CAP_PROP_FRAME_HEIGHT, CAMERA_HEIGHT)
+        camera.set(cv2.CAP_PROP_FPS, CAMERA_FPS)
+
+        # Preallocate the frame buffers and let retrieve() write into them,
+        # instead of allocating a fresh W*H*3 array per frame.
+        # Some backends report 0x0 until the first frame arrives; in that case each
+        # buffer is allocated by the first retrieve() that uses it.
+        width = int(camera.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(camera.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        for _ in range(3):
+            free_buffers.put(np.empty((height, width, 3), dtype=np.uint8) if width and height else None)
+
+        # Reusable single-channel buffer for the grayscale copy handed to pyzbar.
+        gray_buf = None
+
+        # Capture runs on its own thread so frame ingest is decoupled from decoding.
+        grabber = threading.Thread(
+            target=_grab_frames,
+            args=(camera, frames, free_buffers, stop),
+            daemon=True,
+        )
+        grabber.start()
+
+        # Loop until a UPC barcode is detected.
+        # This thread sleeps in frames.get() until the grabber delivers a frame.
+        while upc_code is None:
+            try:
+                frame = frames.get(timeout=1.0)
+            except queue.Empty:
+                # If the grabber died (e.g. retrieve() raised), no frame will ever arrive.
+                if not grabber.is_alive():
+                    raise RuntimeError('Camera grabber thread exited unexpectedly')
+                # No frame within a second (camera stalled or still starting); keep waiting.
+                continue
+
+            try:
+                # ZBar only works on luminance, so convert once here rather than handing it
+                # three channels of BGR. The grayscale buffer is reused across frames and
+                # only reallocated if the camera changes resolution.
+                if gray_buf is None or gray_buf.shape != frame.shape[:2]:
+                    gray_buf = np.empty(frame.shape[:2], dtype=np.uint8)
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=gray_buf)
+            finally:
+                # The BGR frame is no longer needed; give it back to the grabber.
+                free_buffers.put(frame)
+
+            # High-resolution cameras give ZBar far more pixels than a barcode needs.
+            # Halve each dimension (a quarter of the pixels) once the frame is wide
+            # enough that the bars stay resolvable.
+            if gray.shape[1] >= DOWNSCALE_MIN_WIDTH:
+                gray = cv2.resize(gray, None, fx=0.5, fy=0.5, interpolation=cv2.INTER_AREA)
+
+            # Decode any retail barcodes found in the frame.
+            # Limiting symbologies stops ZBar running its QR, Code128, PDF417, etc.
+            # scanners on every frame.
+            decoded_objects = pyzbar.decode(gray, symbols=UPC_SYMBOLS)
+
+            # Iterate over decoded barcodes and select the first UPC found.
+            for obj in decoded_objects:
+                # pyzbar reports the symbology name, e.g. 'UPCA', 'UPCE' or 'EAN13'.
+                # Many US UPC-A codes are reported as EAN13 (with a leading 0).
+                if obj.type in UPC_SYMBOL_NAMES:
+                    # Decode raw bytes into a string UPC code.
+                    upc_code = obj.data.decode('utf-8')
+                    break
+    finally:
+        # Stop the grabber before releasing the camera it is reading from.
+        stop.set()
+        if grabber is not None:
+            grabber.join()
+
+        # Release camera device, even if scanning was interrupted (e.g. Ctrl+C).
+        # Dropping the reference lets the capture object be freed immediately rather
+        # than lingering until interpreter exit.
+        # No OpenCV windows are created, so there is no destroyAllWindows() call: it can
+        # block on a GUI event-loop round-trip and warns on headless machines.
+        camera.release()
+        del camera
 
-        # If frame capture fails, ret may be False and frame may be None.
-        # In production you would handle this with retries and a clear error.
-        if not ret or frame is None:
+    # Create a Sellbrite product listing using the scanned UPC.
+    create_sellbrite_product_listing(api_key, api_secret, upc_code)
+
+
+def _grab_frames(camera, frames, free_buffers, stop):
+    """
+    Grabber thread body: read camera frames and publish the latest one to `frames`.
+
+    - grab() only advances the stream; the expensive decode and color conversion
+      happen in retrieve(), which is skipped for all but every RETRIEVE_EVERY_N-th frame.
+    - Frames are retrieved into buffers taken from free_buffers. A frame the decoder
+      has not picked up yet is replaced, and its buffer goes back to free_buffers.
+    - Runs until `stop` is set.
+    """
+
+    # Counts frames grabbed so only every RETRIEVE_EVERY_N-th frame is decoded.
+    grab_count = 0
+
+    while not stop.is_set():
+        # Pull the next frame from the device without decoding it.
+        # On failure, back off briefly instead of spinning; stop.wait also ends the
+        # pause early when scanning is finished.
+        if not camera.grab():
+            stop.wait(GRAB_RETRY_SECONDS)
             continue
 
-        # Decode any barcodes found in the frame.
-        decoded_objects = pyzbar.decode(frame)
+        grab_count += 1
+        if grab_count % RETRIEVE_EVERY_N:
+            continue
 
-        # Iterate over decoded barcodes and select the first UPC found.
-        for obj in decoded_objects:
-            # pyzbar uses barcode "types" such as 'EAN13', 'UPC', etc.
-            # Depending on your barcode, you might need to accept other types too.
-            if obj.type == 'UPC':
-                # Decode raw bytes into a string UPC code.
-                upc_code = obj.data.decode('utf-8')
-                break
+        # Decode the most recently grabbed frame into a reusable buffer.
+        # OpenCV writes in place when shape and dtype match; otherwise it returns
+        # a new array, which then takes that buffer's place in the rotation.
+        buffer = free_buffers.get()
+        ret, retrieved = camera.retrieve(buffer)
 
-    # Release camera device and close any OpenCV windows.
-    # (No windows are created in this script, but destroyAllWindows is safe.)
-    camera.release()
-    cv2.destroyAllWindows()
+        # If frame capture fails, ret may be False and the frame may be None.
+        # In production you would handle this with retries and a clear error.
+        if not ret or retrieved is None:
+            free_buffers.put(buffer)
+            continue
 
-    # Create a Sellbrite product listing using the scanned UPC.
-    create_sellbrite_product_listing(api_key, api_secret, upc_code)
+        # Replace any frame the decoder has not taken yet. Only this thread puts to
+        # frames, so after this it is empty and put_nowait cannot fail.
+        try:
+            free_buffers.put(frames.get_nowait())
+        except queue.Empty:
+            pass
+        frames.put_nowait(retrieved)
 
 
 def generate_sku():
@@ -90,27 +418,32 @@ def generate_sku():
     Generate a SKU in the format: YYMMDD-B-### where ### is a zero-padded sequential number.
 
     How it works
-    - Reads the last sequence number from SEQUENTIAL_FILE
-    - Increments it
-    - Writes it back to the file
+    - Opens SEQUENTIAL_FILE and takes an exclusive lock on it
+    - Reads the last sequence number and increments it
+    - Writes it back in place, then releases the lock
     - Builds a SKU using current date and the incremented number
 
     Operational considerations
-    - This is not concurrency-safe. Two runs at the same time can generate the same SKU.
-      If you need parallel runs, store the sequence in a database with transactions/locking.
+    - The exclusive flock makes the read-increment-write atomic across concurrent runs
+      on the same machine. It does not protect a file on a network share.
+    - fcntl is POSIX-only (Linux/macOS).
     - The file must exist and contain a valid integer.
     """
 
-    # Read the sequential number from the local file.
-    with open(SEQUENTIAL_FILE, 'r') as f:
+    with open(SEQUENTIAL_FILE, 'r+') as f:
+        # Block until no other process is mid-update; released when the file closes.
+        fcntl.flock(f, fcntl.LOCK_EX)
+
+        # Read the sequential number from the local file.
         seq_number = int(f.read().strip())
 
-    # Increment to get the next sequence number.
-    seq_number += 1
+        # Increment to get the next sequence number.
+        seq_number += 1
 
-    # Persist the new sequence number back to the file.
-    with open(SEQUENTIAL_FILE, 'w') as f:
+        # Persist the new sequence number back to the file while still holding the lock.
+        f.seek(0)
         f.write(str(seq_number))
+        f.truncate()
 
     # Create date prefix: YYMMDD
     date_str = datetime.now().strftime('%y%m%d')
@@ -122,6 +455,29 @@ def generate_sku():
     return sku
 
 
+def release_sku(sku):
+    """
+    Return an unused SKU from generate_sku so the next run reuses its sequence number.
+
+    - Only rolls back if SEQUENTIAL_FILE still holds this SKU's number. If another run has
+      advanced it since, the number is left as a gap rather than risking a duplicate SKU.
+    - Uses the same exclusive lock as generate_sku.
+    """
+
+    seq_number = int(sku.rsplit('-', 1)[1])
+
+    with open(SEQUENTIAL_FILE, 'r+') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+
+        if int(f.read().strip()) != seq_number:
+            return
+
+        f.seek(0)
+        f.write(str(seq_number - 1))
+        f.truncate()
+
+
+@_memoize('ebay')
 def get_ebay_sold_price(upc_code):
     """
     Query eBay FindingService for completed, sold items that match the UPC, and estimate a price.
@@ -129,13 +485,15 @@ def get_ebay_sold_price(upc_code):
     Current behavior
     - Uses findCompletedItems endpoint (XML)
     - Filters for Used, SoldItemsOnly=true, HideDuplicateItems=true
-    - Averages sold prices across returned items
-    - Returns half of the average (average_price / 2)
+    - Requests one page of at most EBAY_MAX_ITEMS sold items and reads all their prices
+    - Returns half of the median (median_low) sold price
 
     Notes
-    - The XML parsing below is fragile: eBay often uses XML namespaces.
-      In production, you should handle namespaces and missing fields.
-    - Returning half the average is a business rule. Adjust to your pricing strategy.
+    - Results (including None) are cached on disk per UPC for CACHE_EXPIRE_SECONDS.
+      Failed lookups raise instead, so they are never cached as "no sold items".
+    - The response is stream-parsed; tags are matched in the FindingService namespace
+      (EBAY_NS) and items without a currentPrice are skipped.
+    - Returning half the median is a business rule. Adjust to your pricing strategy.
     - Requires an eBay App ID.
 
     Returns
@@ -148,115 +506,271 @@ def get_ebay_sold_price(upc_code):
     # eBay FindingService endpoint for search operations
     base_url = 'https://svcs.ebay.com/services/search/FindingService/v1'
 
-    # Query parameters documented by eBay Finding API (legacy).
-    params = {
-        'OPERATION-NAME': 'findCompletedItems',
-        'SERVICE-VERSION': '1.0.0',
-        'SECURITY-APPNAME': ebay_app_id,
-        'GLOBAL-ID': 'EBAY-US',
-        'RESPONSE-DATA-FORMAT': 'XML',
-        'REST-PAYLOAD': '',
-        # Filter only used items
-        'itemFilter(0).name': 'Condition',
-        'itemFilter(0).value': 'Used',
-        # Require sold items only
-        'itemFilter(1).name': 'SoldItemsOnly',
-        'itemFilter(1).value': 'true',
-        # Reduce duplicates
-        'itemFilter(2).name': 'HideDuplicateItems',
-        'itemFilter(2).value': 'true',
-        # Search by UPC as keywords (eBay syntax varies; you may need to revise)
-        'keywords': f'UPC:{upc_code}',
-        # Increase page size
-        'paginationInput.entriesPerPage': '100'
-    }
-
-    # Perform the request to eBay.
-    response = requests.get(base_url, params=params)
-
-    # Parse XML response body into an ElementTree root node.
-    # If eBay returns an error page or non-XML, this will raise.
-    root = ET.fromstring(response.content)
-
-    total_price = 0.0
-    total_items = 0
-
-    # Iterate over each <item> element and sum sold prices.
-    for item in root.iter('item'):
-        # Find the sold price node.
-        # This path may not exist for all items; in production, guard for None.
-        price = float(item.find('sellingStatus/currentPrice').text)
-        total_price += price
-        total_items += 1
-
-    # If any items were found, compute average and apply pricing rule.
-    if total_items > 0:
-        average_price = total_price / total_items
-        # Business rule: price at half of average sold price.
-        return average_price / 2
+    # Overlay the per-call values on the static query parameters.
+    # Search by UPC as keywords (eBay syntax varies; you may need to revise).
+    params = {**EBAY_PARAMS_BASE, 'SECURITY-APPNAME': ebay_app_id, 'keywords': f'UPC:{upc_code}'}
+
+    prices = []
+
+    # Perform the request to eBay and stream-parse the body as it arrives, rather than
+    # buffering the whole response and building a full DOM.
+    # If eBay returns an error page or non-XML, iterparse will raise.
+    # FindingService <ack> value, checked before any item is trusted.
+    ack = None
+
+    with SESSION.get(base_url, params=params, stream=True) as response:
+        # An HTTP error (bad app id, rate limit, outage) must not look like "no sold items".
+        response.raise_for_status()
+
+        # Let urllib3 transparently gunzip the raw stream.
+        response.raw.decode_content = True
+
+        # The page size already caps the sample at EBAY_MAX_ITEMS, so parse the body to the
+        # end. A fully read response lets the keep-alive connection return to the pool.
+        for _, elem in ET.iterparse(response.raw, events=('end',)):
+            # <ack> precedes the search results. Warning still carries valid results.
+            if elem.tag == EBAY_ACK_TAG:
+                ack = elem.text
+                if ack not in ('Success', 'Warning'):
+                    raise RuntimeError(f'eBay FindingService request failed with ack={ack}')
+                continue
+
+            if elem.tag != EBAY_ITEM_TAG:
+                continue
+
+            # Find the sold price node; skip items that do not carry one.
+            price_text = elem.findtext(EBAY_PRICE_PATH)
+            if price_text:
+                prices.append(float(price_text))
+
+            # Drop the parsed <item> subtree so memory stays flat across the response.
+            elem.clear()
+
+    # A body without <ack> is not a FindingService response (e.g. an error document).
+    if ack is None:
+        raise RuntimeError('eBay FindingService response did not contain an ack element')
+
+    # If any items were found, compute the median and apply pricing rule.
+    if prices:
+        # The median is robust to the odd bundle or parts-only listing that skews a mean.
+        median_price = statistics.median_low(prices)
+        # Business rule: price at half of median sold price.
+        return median_price / 2
 
     # No sold items found.
     return None
 
 
+@_memoize('openai')
 def generate_product_info(upc_code):
     """
     Use OpenAI to generate product metadata from a UPC.
 
     Current behavior
-    - Sets openai.api_key directly (should come from env vars)
-    - Calls openai.Completion.create with engine text-davinci-002 (legacy)
-    - Assumes the response is 7 lines in a fixed order:
-      0 title
-      1 description
-      2 brand
-      3 manufacturer
-      4 model_number
-      5 msrp
-      6 category
+    - Calls the chat completions API (OPENAI_MODEL) with a JSON-object response format
+    - Parses the reply with orjson.loads; the keys are PRODUCT_INFO_FIELDS:
+      title, description, brand, manufacturer, model_number, msrp, category
+    - Missing or null keys come back as empty strings rather than raising
+    - Raises ValueError if the reply was truncated at max_tokens
+    - Results are cached on disk per UPC for CACHE_EXPIRE_SECONDS, so rescans do not
+      pay for a second completion.
 
     Risks and improvements
-    - The model may not return exactly 7 lines, which will break indexing.
     - Prompting a model to infer data from a UPC can produce hallucinations.
       Consider calling a UPC database first, then have the model rewrite and enrich.
-    - You should switch to a structured JSON response format to avoid parsing issues.
+    - msrp is whatever string the model returns (e.g. "$19.99").
 
     Returns
     - tuple: (title, description, brand, manufacturer, model_number, msrp, category)
     """
 
-    # OpenAI API key (do not hardcode in real use).
-    openai.api_key = 'your_openai_api_key'
+    response = OPENAI_CLIENT.chat.completions.create(**_product_info_request(upc_code))
+    choice = response.choices[0]
 
-    # Prompt instructing the model to output multiple fields.
-    prompt = (
-        f'Generate a product title, description, brand, manufacturer, model number, MSRP, '
-        f'and category for a product with UPC code {upc_code}.'
-    )
+    return _parse_product_info(choice.message.content, choice.finish_reason)
+
+
+def _product_info_request(upc_code):
+    """
+    Build the chat completions request body for one UPC.
+    Shared by the live call and the Batch API JSONL lines so both ask the same question.
+    """
+    return {
+        'model': OPENAI_MODEL,
+        'response_format': {'type': 'json_object'},
+        'messages': [
+            {'role': 'system', 'content': PRODUCT_INFO_SYSTEM_PROMPT},
+            {'role': 'user', 'content': f'UPC: {upc_code}'},
+        ],
+        'max_tokens': OPENAI_TOKENS_PER_PRODUCT,
+        'temperature': 0.8,
+    }
+
+
+def _parse_product_info(content, finish_reason):
+    """
+    Convert a JSON-mode reply into the product info tuple.
+    A reply cut off at max_tokens (finish_reason 'length') is truncated JSON, so it is
+    rejected with ValueError. Absent or null keys become empty strings.
+    """
+    if finish_reason == 'length':
+        raise ValueError('OpenAI reply was truncated at max_tokens; the JSON is incomplete')
+
+    data = orjson.loads(content)
+    return tuple(_field_text(data.get(field)) for field in PRODUCT_INFO_FIELDS)
+
+
+def _field_text(value):
+    """
+    Render a model-supplied field as text. The model often returns null for unknown
+    fields despite the prompt, and str(None) would send the literal 'None' to Sellbrite.
+    """
+    return '' if value is None else str(value)
+
+
+def generate_product_info_batch(upc_codes):
+    """
+    Use OpenAI to generate product metadata for several UPCs in a single request.
 
-    # Legacy completion endpoint call.
-    response = openai.Completion.create(
-        engine="text-davinci-002",
-        prompt=prompt,
-        max_tokens=150,
-        n=1,
-        stop=None,
+    Sending the UPCs together shares one round-trip and one copy of the instruction
+    prompt across the whole batch, instead of paying for both once per UPC.
+
+    Notes
+    - Keep batches to about OPENAI_BATCH_SIZE UPCs; max_tokens is capped at
+      OPENAI_MAX_OUTPUT_TOKENS, so much larger batches will be truncated.
+    - JSON mode requires a top-level object, so the model returns {"products": [...]}.
+    - Raises ValueError if the model returns a different number of products than UPCs,
+      or any element that is not an object, since results could not be matched back to
+      their UPC safely. Also raises ValueError if the reply was truncated at max_tokens.
+    - Missing or null keys come back as empty strings.
+    - Results are not cached here; see create_sellbrite_product_listings.
+
+    Returns
+    - list of dicts with PRODUCT_INFO_FIELDS keys, element i corresponding to upc_codes[i]
+    """
+
+    upc_codes = list(upc_codes)
+
+    response = OPENAI_CLIENT.chat.completions.create(
+        model=OPENAI_MODEL,
+        response_format={'type': 'json_object'},
+        messages=[
+            {'role': 'system', 'content': PRODUCT_INFO_BATCH_SYSTEM_PROMPT},
+            {'role': 'user', 'content': orjson.dumps({'upcs': upc_codes}).decode('utf-8')},
+        ],
+        max_tokens=min(OPENAI_TOKENS_PER_PRODUCT * len(upc_codes), OPENAI_MAX_OUTPUT_TOKENS),
         temperature=0.8,
     )
 
-    # Parse the generated output by splitting lines.
-    generated_text = response.choices[0].text.strip().split('\n')
+    choice = response.choices[0]
+    if choice.finish_reason == 'length':
+        raise ValueError('OpenAI batch reply was truncated at max_tokens; the JSON is incomplete')
+
+    products = orjson.loads(choice.message.content).get('products')
+    if (
+        not isinstance(products, list)
+        or len(products) != len(upc_codes)
+        or not all(isinstance(product, dict) for product in products)
+    ):
+        raise ValueError(f'Expected {len(upc_codes)} product objects from OpenAI, got: {products!r}')
+
+    return [{field: _field_text(product.get(field)) for field in PRODUCT_INFO_FIELDS} for product in products]
+
+
+def submit_product_info_batch(upc_codes):
+    """
+    Queue product metadata generation for many UPCs through the OpenAI Batch API.
+
+    Intended for bulk reprocessing (e.g. a nightly catalog refresh) where up to 24h
+    turnaround is acceptable. Batch requests cost less than live calls and draw on a
+    separate rate-limit pool.
+
+    How it works
+    - Writes one JSONL line per unique UPC, each a full chat completions request
+      with custom_id set to the UPC
+    - Uploads the file with purpose='batch' and creates a batch against /v1/chat/completions
+
+    Returns
+    - str: the batch id, to pass to collect_product_info_batch
+    """
+
+    lines = [
+        orjson.dumps({
+            'custom_id': upc_code,
+            'method': 'POST',
+            'url': '/v1/chat/completions',
+            'body': _product_info_request(upc_code),
+        })
+        for upc_code in dict.fromkeys(upc_codes)
+    ]
+
+    batch_file = OPENAI_CLIENT.files.create(
+        file=('product_info_batch.jsonl', b'\n'.join(lines)),
+        purpose='batch',
+    )
+
+    batch = OPENAI_CLIENT.batches.create(
+        input_file_id=batch_file.id,
+        endpoint='/v1/chat/completions',
+        completion_window='24h',
+    )
+
+    return batch.id
+
+
+def collect_product_info_batch(batch_id, poll_seconds=60):
+    """
+    Wait for a batch from submit_product_info_batch to finish and return its results.
+
+    How it works
+    - Polls the batch every poll_seconds until it reaches a terminal status
+    - Downloads the output file and parses it line by line
+    - Stores each result under generate_product_info's cache key, so later listings
+      for these UPCs do not make a live OpenAI call
+
+    Notes
+    - Raises RuntimeError if the batch failed, expired or was cancelled.
+    - UPCs whose individual request errored or was truncated are left out of the result.
+
+    Returns
+    - dict: upc_code -> (title, description, brand, manufacturer, model_number, msrp, category)
+    """
 
-    # Assumes strict ordering and presence of all lines.
-    title = generated_text[0]
-    description = generated_text[1]
-    brand = generated_text[2]
-    manufacturer = generated_text[3]
-    model_number = generated_text[4]
-    msrp = generated_text[5]
-    category = generated_text[6]
+    while True:
+        batch = OPENAI_CLIENT.batches.retrieve(batch_id)
+        if batch.status == 'completed':
+            break
+        if batch.status in ('failed', 'expired', 'cancelled'):
+            raise RuntimeError(f'OpenAI batch {batch_id} ended with status {batch.status}')
+        time.sleep(poll_seconds)
 
-    return title, description, brand, manufacturer, model_number, msrp, category
+    results = {}
+
+    # A batch where every request failed has no output file.
+    if not batch.output_file_id:
+        return results
+
+    output = OPENAI_CLIENT.files.content(batch.output_file_id).text
+    for line in output.splitlines():
+        if not line.strip():
+            continue
+
+        record = orjson.loads(line)
+        response = record.get('response') or {}
+        if response.get('status_code') != 200:
+            continue
+
+        # Treat a reply truncated at max_tokens like an errored request.
+        choice = response['body']['choices'][0]
+        if choice.get('finish_reason') == 'length':
+            continue
+
+        upc_code = record['custom_id']
+        info = _parse_product_info(choice['message']['content'], choice.get('finish_reason'))
+        get_cache().set(generate_product_info.__cache_key__(upc_code), info, expire=CACHE_EXPIRE_SECONDS)
+        results[upc_code] = info
+
+    return results
 
 
 def create_sellbrite_product_listing(api_key, api_secret, upc_code):
@@ -267,46 +781,70 @@ def create_sellbrite_product_listing(api_key, api_secret, upc_code):
     - A sequential SKU
 
     Steps
-    1) Prepare Sellbrite API request headers
-    2) Generate metadata via OpenAI
-    3) Query eBay for sold price estimate
-    4) Compute final price
-    5) Generate SKU
-    6) Build product payload
-    7) POST /products to Sellbrite
+    1) Get the pre-authenticated Sellbrite session
+    2) In parallel: generate metadata via OpenAI, query eBay for a sold price
+       estimate (skipped when a cached estimate exists), and generate the SKU
+    3) Compute final price
+    4) Build product payload
+    5) POST /products to Sellbrite
 
     Notes
-    - The Authorization header here is not correct for standard HTTP Basic auth.
-      Most APIs expect base64("key:secret") with "Basic {base64}".
-      See README for a corrected approach.
-    - In production, validate msrp parsing and currency formatting.
-    """
+    - The three lookups in step 2 are independent and I/O-bound, so they run on a
+      small thread pool. Total latency is roughly that of the slowest call (usually OpenAI).
+    - The SKU is generated up front. It is handed back with release_sku only when the
+      product cannot exist: the OpenAI or eBay call failed, the connection was never made
+      (connect timeout, refused connection or DNS failure), or a single POST attempt got a
+      4xx other than 409 Conflict. Otherwise a gap is left rather than risk reusing a SKU
+      that is live on Sellbrite.
+    - Transient Sellbrite failures (429/503) are retried by the session with backoff.
+    - If the MSRP fallback contains no number, the price is 0.0; review such listings.
 
-    base_url = 'https://api.sellbrite.com/v1'
+    Returns
+    - str: the SKU of the created product
 
-    headers = {
-        'Content-Type': 'application/json',
-        # This is a placeholder style and likely incorrect for Sellbrite.
-        # Usually Basic auth uses a base64-encoded "key:secret" string.
-        'Authorization': f'Basic {api_key}:{api_secret}'
-    }
+    Raises
+    - requests.HTTPError if Sellbrite does not return a 2xx; the message names the SKU
+      and whether it was released, and .response holds the final response
+    """
 
-    # Generate product fields using OpenAI.
-    title, description, brand, manufacturer, model_number, msrp, category = generate_product_info(upc_code)
+    base_url = 'https://api.sellbrite.com/v1'
 
-    # Attempt to compute a price from eBay sold listings.
-    ebay_sold_price = get_ebay_sold_price(upc_code)
+    # Basic auth and Content-Type are configured once on this session.
+    sellbrite = _sellbrite_session(api_key, api_secret)
+
+    # A cached eBay estimate (still within CACHE_EXPIRE_SECONDS) is used directly, taking the
+    # eBay round-trip off the critical path. None is a valid cached value ("no sold items"),
+    # so a sentinel distinguishes a miss.
+    ebay_sold_price = get_cache().get(get_ebay_sold_price.__cache_key__(upc_code), default=_CACHE_MISS)
+
+    # Run the OpenAI, eBay and SKU lookups concurrently and wait for all of them.
+    # .result() re-raises any exception from the worker thread here.
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        # Generate product fields using OpenAI.
+        info_future = executor.submit(generate_product_info, upc_code)
+        # Attempt to compute a price from eBay sold listings, unless already cached.
+        ebay_future = executor.submit(get_ebay_sold_price, upc_code) if ebay_sold_price is _CACHE_MISS else None
+        # Generate a SKU unique per run (subject to sequential file correctness).
+        sku_future = executor.submit(generate_sku)
+
+        sku = sku_future.result()
+        try:
+            title, description, brand, manufacturer, model_number, msrp, category = info_future.result()
+            if ebay_future is not None:
+                ebay_sold_price = ebay_future.result()
+        except Exception:
+            # Nothing was created, so do not burn the sequence number.
+            release_sku(sku)
+            raise
 
     # If eBay price is available, use it. Otherwise fallback to MSRP/2.
     if ebay_sold_price is not None:
         price = ebay_sold_price
     else:
-        # msrp from the model is a string and may include currency symbols.
-        # This float conversion can fail if msrp is not a clean numeric string.
-        price = float(msrp) / 2
-
-    # Generate a SKU unique per run (subject to sequential file correctness).
-    sku = generate_sku()
+        # msrp from the model is a string and may include currency symbols or text,
+        # e.g. "$1,299.99" or "19.99 USD". Use the first number found, or 0.0 if none.
+        match = PRICE_RE.search(msrp)
+        price = float(match.group().replace(',', '')) / 2 if match else 0.0
 
     # Build Sellbrite product payload.
     payload = {
@@ -322,17 +860,83 @@ def create_sellbrite_product_listing(api_key, api_secret, upc_code):
     }
 
     # Create the product in Sellbrite.
-    response = requests.post(
-        f'{base_url}/products',
-        headers=headers,
-        data=json.dumps(payload)
-    )
+    # The session retries 429/503 responses before returning here.
+    try:
+        response = sellbrite.post(
+            f'{base_url}/products',
+            # orjson returns bytes, which requests sends as-is without an intermediate str.
+            data=orjson.dumps(payload)
+        )
+    except requests.ConnectionError as error:
+        # A connect timeout, refused connection or DNS failure means the request was never
+        # sent, so nothing can have been created. Read errors may follow a processed
+        # request, so their SKU is not released.
+        reason = getattr(error.args[0], 'reason', None) if error.args else None
+        if isinstance(error, requests.ConnectTimeout) or isinstance(reason, NewConnectionError):
+            release_sku(sku)
+        raise
 
     # Sellbrite typically returns 201 Created on success.
-    if response.status_code == 201:
+    if 200 <= response.status_code < 300:
         print("Product listing created successfully.")
-    else:
-        print(f"Failed to create product listing. Error: {response.text}")
+        return sku
+
+    # Release the SKU only if this was the sole attempt and it was rejected outright.
+    # 409 means the SKU already exists on Sellbrite, so it must not be handed out again.
+    retries = getattr(response.raw, 'retries', None)
+    single_attempt = retries is not None and not retries.history
+    released = single_attempt and 400 <= response.status_code < 500 and response.status_code != 409
+    if released:
+        release_sku(sku)
+
+    raise requests.HTTPError(
+        f"Failed to create product listing (HTTP {response.status_code}, "
+        f"SKU {sku} {'released' if released else 'not released'}). Error: {response.text}",
+        response=response,
+    )
+
+
+def create_sellbrite_product_listings(api_key, api_secret, upc_codes):
+    """
+    Create Sellbrite products for several scanned UPCs.
+
+    Metadata for every UPC not already in the disk cache is generated with
+    generate_product_info_batch, OPENAI_BATCH_SIZE UPCs per call. It is stored under
+    generate_product_info's cache key, so each create_sellbrite_product_listing call
+    below reads it without another OpenAI request.
+
+    A UPC that Sellbrite rejects does not stop the rest of the run.
+
+    Returns
+    - dict: upc_code -> requests.HTTPError for every UPC whose product was not created
+    """
+
+    upc_codes = list(upc_codes)
+
+    # De-duplicate while preserving scan order, and skip UPCs that are already cached.
+    missing = [
+        upc_code for upc_code in dict.fromkeys(upc_codes)
+        if generate_product_info.__cache_key__(upc_code) not in get_cache()
+    ]
+
+    for start in range(0, len(missing), OPENAI_BATCH_SIZE):
+        chunk = missing[start:start + OPENAI_BATCH_SIZE]
+        for upc_code, info in zip(chunk, generate_product_info_batch(chunk)):
+            get_cache().set(
+                generate_product_info.__cache_key__(upc_code),
+                tuple(info[field] for field in PRODUCT_INFO_FIELDS),
+                expire=CACHE_EXPIRE_SECONDS,
+            )
+
+    failures = {}
+    for upc_code in upc_codes:
+        try:
+            create_sellbrite_product_listing(api_key, api_secret, upc_code)
+        except requests.HTTPError as error:
+            print(error)
+            failures[upc_code] = error
+
+    return failures
 
 
 # Standard Python entrypoint guard so this script can be imported without running main().